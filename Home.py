@@ -1,5 +1,6 @@
 import streamlit as st
-import pandas as pd
+
+from scripts.data_utils import load_metadata, sources_mtime
 
 st.set_page_config(page_title="Rossmann Sales Analysis", layout="wide")
 
@@ -28,18 +29,18 @@ Download the original data here:
 https://www.kaggle.com/datasets/shahpranshu27/rossman-store-sales
 """)
 
-# Quick high-level KPIs
+# Quick high-level KPIs, read from the metadata sidecar instead of the full train.csv
+# keyed on the CSVs' mtime so a new train.csv invalidates the cached KPIs
 @st.cache_data
-def load_sample():
-    df = pd.read_csv("data/train.csv", parse_dates=["Date"])
-    return df
+def get_metadata(source_mtime):
+    return load_metadata()["train"]
 
-df = load_sample()
+meta = get_metadata(sources_mtime())
 # Quick high-level KPIs (wider first column)
 col1, col2, col3 = st.columns([2, 1, 1])
-col1.metric("🗓️ Date Range", f"{df.Date.min().date()} → {df.Date.max().date()}")
-col2.metric("🏬 Number of Stores", f"{df.Store.nunique():,}")
-col3.metric("📈 Total Records",      f"{len(df):,}")
+col1.metric("🗓️ Date Range", f"{meta['date_min']} → {meta['date_max']}")
+col2.metric("🏬 Number of Stores", f"{meta['n_stores']:,}")
+col3.metric("📈 Total Records",      f"{meta['rows']:,}")
 
 st.markdown("---")
 st.markdown("👉 Use the sidebar to navigate through each analysis step. Adjust parameters interactively to see real-time updates and insights! 🚀")
@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from scripts.approx_ui import approx_note, error_bars, query_mode_sidebar, show_chart
+from scripts.data_utils import STORE_PATH, TRAIN_PATH, load_metadata, read_train, sources_mtime
+from scripts.sample_utils import estimate_corr, estimate_histogram, estimate_total, histogram
+
 st.title("🔍 Data Overview")
 st.markdown("""
 **Purpose of this page:**  
@@ -9,22 +13,28 @@ Load and inspect the Rossmann datasets to understand their structure,
 highlight missing or extreme values, and interactively explore key sales trends.
 """)
 
+# The full train history is never loaded up front: summaries come from the
+# metadata sidecar, charts from a sample or from column/partition-pruned reads.
+@st.cache_data
+def load_store():
+    return pd.read_csv(STORE_PATH)
+
 @st.cache_data
-def load_data():
-    df_train = pd.read_csv("data/train.csv", parse_dates=["Date"])
-    df_store = pd.read_csv("data/store.csv")
-    return df_train, df_store
+def get_metadata(source_mtime):
+    return load_metadata()
 
-df_train, df_store = load_data()
+df_store = load_store()
+meta = get_metadata(sources_mtime())
+approx_mode, sample = query_mode_sidebar()
 
 # Dataset shapes
 st.subheader("📦 Dataset Shapes")
-st.markdown(f"- **Train:** {df_train.shape[0]:,} rows × {df_train.shape[1]} cols - **Store:** {df_store.shape[0]:,} rows × {df_store.shape[1]} cols")
+st.markdown(f"- **Train:** {meta['train']['rows']:,} rows × {meta['train']['cols']} cols - **Store:** {meta['store']['rows']:,} rows × {meta['store']['cols']} cols")
 
 # Raw samples
 if st.checkbox("Show raw data samples"):
     st.write("**Train sample:**")
-    st.dataframe(df_train.head())
+    st.dataframe(pd.read_csv(TRAIN_PATH, nrows=5, parse_dates=["Date"]))
     st.write("**Store sample:**")
     st.dataframe(df_store.head())
 
@@ -32,11 +42,11 @@ if st.checkbox("Show raw data samples"):
 st.subheader("❓ Missing Values")
 col1, col2 = st.columns(2)
 with col1:
-    missing_train = df_train.isnull().sum().loc[lambda x: x>0]
+    missing_train = pd.Series(meta["train"]["null_counts"]).loc[lambda x: x>0]
     st.markdown("**Train:**")
     st.dataframe(missing_train)
 with col2:
-    missing_store = df_store.isnull().sum().loc[lambda x: x>0]
+    missing_store = pd.Series(meta["store"]["null_counts"]).loc[lambda x: x>0]
     st.markdown("**Store:**")
     st.dataframe(missing_store)
 st.markdown("*We’ll need to impute or flag these missing values before modeling.*")
@@ -44,26 +54,49 @@ st.markdown("*We’ll need to impute or flag these missing values before modelin
 # Interactive Sales Distribution
 st.subheader("📊 Sales Distribution")
 bins = st.slider("Number of histogram bins", 10, 200, 50)
-fig_hist = px.histogram(
-    df_train, x="Sales", nbins=bins, 
-    log_y=True, title="Daily Sales Distribution (log y)",
-    labels={"Sales":"Daily Sales"},
-    hover_data=["Customers"]
+
+def draw_sales_hist(hist, approx):
+    fig = px.bar(
+        hist, x="bin_mid", y="estimate",
+        log_y=True, title="Daily Sales Distribution (log y)" + approx_note(sample, approx),
+        labels={"bin_mid":"Daily Sales", "estimate":"Count"},
+        hover_data=["bin_left", "bin_right"],
+        **error_bars(hist, "estimate")
+    )
+    fig.update_layout(bargap=0)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Same bin edges for the approximate and exact histograms
+sales_range = (meta["train"]["sales_min"], meta["train"]["sales_max"])
+show_chart(
+    ("sales_hist", bins),
+    lambda: estimate_histogram(sample, "Sales", bins=bins, range=sales_range),
+    lambda: histogram(read_train(columns=["Sales"]), "Sales", bins=bins, range=sales_range),
+    draw_sales_hist,
+    approx_mode,
 )
-st.plotly_chart(fig_hist, use_container_width=True)
 st.markdown("""
 - **Why log y-axis?** It lets us see both the very common low-sales days and the rare extremely high-sales outliers on the same chart.  
-- **Hover data:** Shows customer counts for each bin to understand the sales-customers relationship.
+- **Error bars:** In approximate mode, bin counts are estimated from the sample with 95% intervals; the exact counts replace them once computed.
 """)
 
 # Interactive Boxplot for Outliers
 st.subheader("🗃️ Boxplot of Daily Sales")
-fig_box = px.box(
-    df_train, x="Sales", 
-    title="Boxplot of Daily Sales",
-    labels={"Sales":"Daily Sales"},
+def draw_box(frame, approx):
+    fig_box = px.box(
+        frame, x="Sales", 
+        title="Boxplot of Daily Sales" + approx_note(sample, approx),
+        labels={"Sales":"Daily Sales"},
+    )
+    st.plotly_chart(fig_box, use_container_width=True)
+
+show_chart(
+    "sales_box",
+    lambda: sample[["Sales"]],
+    lambda: read_train(columns=["Sales"]),
+    draw_box,
+    approx_mode,
 )
-st.plotly_chart(fig_box, use_container_width=True)
 st.markdown("""
 - **Boxplot interpretation:**  
   - The box spans the interquartile range (Q1 to Q3).  
@@ -75,25 +108,39 @@ st.markdown("""
 st.subheader("📈 Monthly Sales Trend")
 min_date, max_date = st.date_input(
     "Select date range", 
-    value=(df_train.Date.min(), df_train.Date.max()),
+    value=(pd.to_datetime(meta["train"]["date_min"]).date(), pd.to_datetime(meta["train"]["date_max"]).date()),
     key="date_range"
 )
-mask = (df_train.Date >= pd.to_datetime(min_date)) & (df_train.Date <= pd.to_datetime(max_date))
-monthly = (
-    df_train.loc[mask]
-            .set_index("Date")
-            .Sales
-            .resample("M")
-            .sum()
-            .reset_index()
-)
-fig_line = px.line(
-    monthly, x="Date", y="Sales",
-    title="Total Sales per Month",
-    labels={"Sales":"Total Sales", "Date":"Month"},
-    markers=True
-)
-st.plotly_chart(fig_line, use_container_width=True)
+start, end = pd.to_datetime(min_date), pd.to_datetime(max_date)
+
+def monthly_exact():
+    # only the partitions in the selected range are read
+    return (
+        read_train(start, end, columns=["Date", "Sales"])
+                .set_index("Date")
+                .Sales
+                .resample("ME")
+                .sum()
+                .reset_index()
+    )
+
+def monthly_approx():
+    in_range = (sample.Date >= start) & (sample.Date <= end)
+    month_end = (sample.Date + pd.offsets.MonthEnd(0)).where(in_range)
+    est = estimate_total(sample, "Sales", by=month_end, where=in_range)
+    return est.rename_axis("Date").reset_index().rename(columns={"estimate": "Sales"})
+
+def draw_monthly(monthly, approx):
+    fig_line = px.line(
+        monthly, x="Date", y="Sales",
+        title="Total Sales per Month" + approx_note(sample, approx),
+        labels={"Sales":"Total Sales", "Date":"Month"},
+        markers=True,
+        **error_bars(monthly, "Sales")
+    )
+    st.plotly_chart(fig_line, use_container_width=True)
+
+show_chart(("monthly_sales", start, end), monthly_approx, monthly_exact, draw_monthly, approx_mode)
 st.markdown("""
 - **Seasonality:** Look for regular peaks (e.g., around holidays) or troughs in the year.  
 - **Trend:** Observe if overall sales are increasing, flat, or declining over time.  
@@ -102,21 +149,31 @@ st.markdown("""
 
 # Correlation of numeric features (with CompetitionDistance merged)
 st.subheader("🔗 Correlation Between Numeric Features")
-df_merged = df_train.merge(
-    df_store[["Store", "CompetitionDistance"]], on="Store", how="left"
-).copy()
-df_merged["CompetitionDistance"].fillna(df_merged.CompetitionDistance.median(), inplace=True)
-
 numeric_cols = ["Sales", "Customers", "CompetitionDistance"]
-corr = df_merged[numeric_cols].corr().round(2)
-fig_corr = px.imshow(
-    corr,
-    text_auto=True,
-    aspect="auto",
-    title="Correlation Matrix",
-    labels=dict(x="Feature", y="Feature", color="Correlation")
-)
-st.plotly_chart(fig_corr, use_container_width=True)
+
+def corr_exact():
+    df_merged = read_train(columns=["Store", "Sales", "Customers"]).merge(
+        df_store[["Store", "CompetitionDistance"]], on="Store", how="left"
+    )
+    df_merged["CompetitionDistance"] = df_merged.CompetitionDistance.fillna(df_merged.CompetitionDistance.median())
+    return df_merged[numeric_cols].corr()
+
+def corr_approx():
+    frame = sample.copy()
+    frame["CompetitionDistance"] = frame.CompetitionDistance.fillna(frame.CompetitionDistance.median())
+    return estimate_corr(frame, numeric_cols)
+
+def draw_corr(corr, approx):
+    fig_corr = px.imshow(
+        corr.round(2),
+        text_auto=True,
+        aspect="auto",
+        title="Correlation Matrix" + approx_note(sample, approx),
+        labels=dict(x="Feature", y="Feature", color="Correlation")
+    )
+    st.plotly_chart(fig_corr, use_container_width=True)
+
+show_chart("numeric_corr", corr_approx, corr_exact, draw_corr, approx_mode)
 st.markdown("""
 - **Sales vs. Customers:** Strong positive correlation indicates higher footfall drives sales.  
 - **Sales vs. CompetitionDistance:** A mild negative correlation suggests stores closer to competitors may see slightly lower sales.  
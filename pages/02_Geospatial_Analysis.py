@@ -1,10 +1,8 @@
 import streamlit as st
 import pandas as pd
-import folium
 from streamlit_folium import st_folium
-from sklearn.cluster import KMeans
 
-from scripts.data_utils import load_data
+from scripts.data_utils import STORE_PATH, read_train
 from scripts.geo_utils import simulate_store_geodata
 
 st.title("🗺️ Geospatial Analysis of Rossmann Stores")
@@ -26,7 +24,8 @@ def prep_store_data(_store_ids: tuple):
     - simulate geodata for each store ID tuple
     Returns a DataFrame (not GeoDataFrame) with Store, avg_sales, geometry.
     """
-    df  = load_data()
+    # every store is needed here, so only the column projection saves I/O
+    df  = read_train(columns=["Store", "Sales"])
     avg = df.groupby("Store").Sales.mean().reset_index(name="avg_sales")
     # only keep those store IDs passed in, to guarantee consistent caching
     avg = avg[avg.Store.isin(_store_ids)]
@@ -39,14 +38,24 @@ def prep_store_data(_store_ids: tuple):
     merged["lon"] = merged.geometry.x
     return merged
 
-# Convert list to tuple so it's hashable
-store_ids = tuple(load_data().Store.unique())
+@st.cache_data
+def get_store_ids():
+    # Store IDs come from the small store table; convert to tuple so it's hashable
+    return tuple(pd.read_csv(STORE_PATH, usecols=["Store"]).Store)
+
+store_ids = get_store_ids()
 stores = prep_store_data(store_ids)
 
 # 2) Cluster on avg_sales 
+@st.cache_data
+def cluster_stores(avg_sales: pd.DataFrame, k: int):
+    from sklearn.cluster import KMeans
+
+    km = KMeans(n_clusters=k, random_state=42)
+    return km.fit_predict(avg_sales)
+
 k = st.slider("Number of clusters", 2, 6, 4)
-km = KMeans(n_clusters=k, random_state=42)
-stores["cluster"] = km.fit_predict(stores[["avg_sales"]])
+stores["cluster"] = cluster_stores(stores[["avg_sales"]], k)
 st.write("Cluster sizes:", stores.cluster.value_counts())
 
 # 2.1) Explain what the clusters represent
@@ -66,43 +75,50 @@ for _, row in cluster_stats.iterrows():
     )
 
 # 3) Build Folium map 
-# Define color palette (hex)
-palette = ["#e41a1c","#377eb8","#4daf4a","#984ea3","#ff7f00","#ffff33"][:k]
-
-m = folium.Map(location=[51.2, 10.4], zoom_start=6)
-
-# Prepare a FeatureGroup for each cluster
-cluster_groups = {
-    i: folium.FeatureGroup(name=f"Cluster {i}", show=True)
-    for i in range(k)
-}
-
-# precompute max for sizing
-max_sales = stores.avg_sales.max()
-
-for _, row in stores.iterrows():
-    radius = max(3, (row.avg_sales / max_sales) * 15)
-    marker = folium.CircleMarker(
-        location=[row.lat, row.lon],
-        radius=radius,
-        color=palette[int(row.cluster)],
-        fill=True,
-        fill_opacity=0.7,
-        popup=f"Store {row.Store} | Avg: {row.avg_sales:.0f}"
-    )
-    cluster_groups[row.cluster].add_child(marker)
+def build_map(stores, k):
+    """
+    Folium map with one toggleable FeatureGroup of circle markers per cluster.
+    """
+    import folium
+
+    # Define color palette (hex)
+    palette = ["#e41a1c","#377eb8","#4daf4a","#984ea3","#ff7f00","#ffff33"][:k]
+
+    m = folium.Map(location=[51.2, 10.4], zoom_start=6)
+
+    # Prepare a FeatureGroup for each cluster
+    cluster_groups = {
+        i: folium.FeatureGroup(name=f"Cluster {i}", show=True)
+        for i in range(k)
+    }
+
+    # precompute max for sizing
+    max_sales = stores.avg_sales.max()
+
+    for _, row in stores.iterrows():
+        radius = max(3, (row.avg_sales / max_sales) * 15)
+        marker = folium.CircleMarker(
+            location=[row.lat, row.lon],
+            radius=radius,
+            color=palette[int(row.cluster)],
+            fill=True,
+            fill_opacity=0.7,
+            popup=f"Store {row.Store} | Avg: {row.avg_sales:.0f}"
+        )
+        cluster_groups[row.cluster].add_child(marker)
 
-# 4) Add all cluster groups to the map
-for fg in cluster_groups.values():
-    m.add_child(fg)
+    # 4) Add all cluster groups to the map
+    for fg in cluster_groups.values():
+        m.add_child(fg)
 
-# 5) Add the layer control (the “legend”)
-folium.LayerControl(position='topleft', collapsed=False).add_to(m)
+    # 5) Add the layer control (the “legend”)
+    folium.LayerControl(position='topleft', collapsed=False).add_to(m)
+    return m
 
 # 6) Render
 st.subheader("Interactive Store Clusters Map")
 st.caption("Use the checkboxes to toggle cluster visibility")
-st_folium(m, width=800, height=600)
+st_folium(build_map(stores, k), width=800, height=600)
 
 st.markdown("""
 - **Circle size** ∝ average daily sales.  
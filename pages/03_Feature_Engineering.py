@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
-from scripts.data_utils import load_data
+from scripts.approx_ui import approx_note, error_bars, query_mode_sidebar, show_chart
+from scripts.data_utils import STORE_PATH, load_data, read_train
+from scripts.sample_utils import (
+    estimate_histogram,
+    estimate_mean,
+    estimate_total,
+    histogram,
+    sample_fraction,
+)
 
 st.title("⚙️ Feature Engineering")
 st.markdown("""
@@ -21,7 +28,55 @@ def get_data():
     df = load_data()
     return df.copy()
 
-df = get_data()
+approx_mode, sample = query_mode_sidebar()
+# The full merged data is only loaded in exact mode
+if approx_mode:
+    df = sample.copy()
+    st.caption(
+        f"Approximate mode: features below are computed on a {sample_fraction(df):.1%} sample; "
+        "charts show full-data estimates with 95% CIs until the exact results arrive."
+    )
+else:
+    df = get_data()
+
+def load_full():
+    """
+    Store-merged train rows with just the train columns the exact queries below need.
+    """
+    return read_train(columns=["Store", "Date", "Sales"]).merge(
+        pd.read_csv(STORE_PATH), on="Store", how="left"
+    )
+
+def impute(frame):
+    frame["CompetitionDistance"] = frame["CompetitionDistance"].fillna(frame["CompetitionDistance"].median())
+    frame["Promo2SinceWeek"] = frame["Promo2SinceWeek"].fillna(0)
+    frame["Promo2SinceYear"] = frame["Promo2SinceYear"].fillna(frame["Promo2SinceYear"].median())
+    return frame
+
+def comp_open_months(frame):
+    # months open = (Year ×12 + Month) – (CompetitionOpenSinceYear×12 + CompetitionOpenSinceMonth)
+    year, month = frame["Date"].dt.year, frame["Date"].dt.month
+    return (
+        (year * 12 + month)
+      - (frame.CompetitionOpenSinceYear.fillna(year).astype(int) * 12
+         + frame.CompetitionOpenSinceMonth.fillna(month).astype(int))
+    )
+
+def draw_hist(title, x_label, facet_col=None):
+    """
+    Draw function for `estimate_histogram` / `histogram` frames.
+    """
+    def draw(hist, approx):
+        fig = px.bar(
+            hist, x="bin_mid", y="estimate", facet_col=facet_col,
+            title=title + approx_note(sample, approx),
+            labels={"bin_mid": x_label, "estimate": "Count"},
+            hover_data=["bin_left", "bin_right"],
+            **error_bars(hist, "estimate")
+        )
+        fig.update_layout(bargap=0)
+        st.plotly_chart(fig, use_container_width=True)
+    return draw
 
 # Date-based features
 st.subheader("📅 Date-Based Features")
@@ -36,24 +91,41 @@ st.write("Sample of new date features:", df[["Date","year","month","day_of_week"
 df["month_name"] = df["Date"].dt.month_name().str.slice(stop=3)  # e.g. "Jan", "Feb", …
 
 # Recompute average sales by month name
-monthly_sales = (
-    df.groupby("month_name")
-      .Sales.mean()
-      # re-order the categories Jan → Dec
-      .reindex([
-         "Jan","Feb","Mar","Apr","May","Jun",
-         "Jul","Aug","Sep","Oct","Nov","Dec"
-      ])
-      .reset_index()
-)
+months = [
+    "Jan","Feb","Mar","Apr","May","Jun",
+    "Jul","Aug","Sep","Oct","Nov","Dec"
+]
 
-fig_month = px.bar(
-    monthly_sales,
-    x="month_name", y="Sales",
-    title="Average Sales by Month",
-    labels={"month_name":"Month","Sales":"Avg Sales"}
-)
-st.plotly_chart(fig_month, use_container_width=True)
+def monthly_exact():
+    month_sales = read_train(columns=["Date", "Sales"])
+    return (
+        month_sales.groupby(month_sales.Date.dt.month_name().str.slice(stop=3).rename("month_name"))
+                   .Sales.mean()
+                   # re-order the categories Jan → Dec
+                   .reindex(months)
+                   .reset_index()
+    )
+
+def monthly_approx():
+    return (
+        estimate_mean(df, "Sales", by="month_name")
+            .reindex(months)
+            .rename_axis("month_name")
+            .reset_index()
+            .rename(columns={"estimate": "Sales"})
+    )
+
+def draw_monthly(monthly_sales, approx):
+    fig_month = px.bar(
+        monthly_sales,
+        x="month_name", y="Sales",
+        title="Average Sales by Month" + approx_note(sample, approx),
+        labels={"month_name":"Month","Sales":"Avg Sales"},
+        **error_bars(monthly_sales, "Sales")
+    )
+    st.plotly_chart(fig_month, use_container_width=True)
+
+show_chart("avg_sales_by_month", monthly_approx, monthly_exact, draw_monthly, approx_mode)
 st.markdown("""
 > **Why?**  
 Annual seasonality is key in retail—this chart shows which months are strongest for sales.
@@ -61,22 +133,37 @@ Annual seasonality is key in retail—this chart shows which months are stronges
 
 # Handling missing & extreme values
 st.subheader("⚠️ Missing & Extreme Values")
-mv = df[["CompetitionDistance","Promo2SinceWeek","Promo2SinceYear"]].isnull().sum()
-st.write("Missing before imputation:", mv)
+missing_cols = ["CompetitionDistance","Promo2SinceWeek","Promo2SinceYear"]
+
+def missing_approx():
+    nulls = df[missing_cols].isnull().astype(float).assign(Store=df.Store, SampleWeight=df.SampleWeight)
+    return pd.concat([
+        estimate_total(nulls, c).rename(index={"all": c}) for c in missing_cols
+    ]).round()
+
+show_chart(
+    "fe_missing",
+    missing_approx,
+    lambda: load_full()[missing_cols].isnull().sum().to_frame("estimate"),
+    lambda mv, approx: st.write("Missing before imputation" + approx_note(sample, approx) + ":", mv),
+    approx_mode,
+)
 
 # Impute missing
-df["CompetitionDistance"].fillna(df["CompetitionDistance"].median(), inplace=True)
-df["Promo2SinceWeek"].fillna(0, inplace=True)
-df["Promo2SinceYear"].fillna(df["Promo2SinceYear"].median(), inplace=True)
+df = impute(df)
 
-st.write("Missing after imputation:", df[["CompetitionDistance","Promo2SinceWeek","Promo2SinceYear"]].isnull().sum())
+st.write("Missing after imputation:", df[missing_cols].isnull().sum())
 
-# Distribution of CompetitionDistance
-fig_comp = px.histogram(
-    df, x="CompetitionDistance", nbins=50,
-    title="Competition Distance After Imputation"
+# Distribution of CompetitionDistance (store-level field, so the store table bounds every bin)
+store_distances = pd.read_csv(STORE_PATH, usecols=["CompetitionDistance"]).CompetitionDistance
+distance_range = (store_distances.min(), store_distances.max())
+show_chart(
+    "fe_competition_distance",
+    lambda: estimate_histogram(df, "CompetitionDistance", bins=50, range=distance_range),
+    lambda: histogram(impute(load_full()), "CompetitionDistance", bins=50, range=distance_range),
+    draw_hist("Competition Distance After Imputation", "CompetitionDistance"),
+    approx_mode,
 )
-st.plotly_chart(fig_comp, use_container_width=True)
 st.markdown("""
 > **Note:**  
 We imputed distances with the median to preserve central tendency; zeroed out missing promo fields, as “no promo” makes sense as 0.
@@ -84,14 +171,20 @@ We imputed distances with the median to preserve central tendency; zeroed out mi
 
 # Encoding categorical variables
 st.subheader("🔠 One-Hot Encoding of Categories")
+@st.cache_data
+def encode_categoricals(frame: pd.DataFrame):
+    from sklearn.preprocessing import OneHotEncoder
+
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    encoded = encoder.fit_transform(frame)
+    return pd.DataFrame(
+        encoded,
+        columns=encoder.get_feature_names_out(frame.columns),
+        index=frame.index
+    )
+
 categoricals = ["StoreType","Assortment","PromoInterval"]
-encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
-encoded = encoder.fit_transform(df[categoricals])
-encoded_df = pd.DataFrame(
-    encoded,
-    columns=encoder.get_feature_names_out(categoricals),
-    index=df.index
-)
+encoded_df = encode_categoricals(df[categoricals])
 st.write("Encoded feature sample:", encoded_df.head())
 st.markdown("""
 > **Why?**  
@@ -100,24 +193,45 @@ Converts text categories into binary columns so most ML models can ingest them d
 
 # Scaling numeric variables
 st.subheader("📏 Scaling Numeric Features")
+@st.cache_data
+def scale_features(frame: pd.DataFrame):
+    from sklearn.preprocessing import StandardScaler
+
+    scaled = StandardScaler().fit_transform(frame)
+    return pd.DataFrame(
+        scaled,
+        columns=[f"{c}_scaled" for c in frame.columns],
+        index=frame.index
+    )
+
 to_scale = ["CompetitionDistance","Promo2SinceWeek"]
-scaler = StandardScaler()
-scaled = scaler.fit_transform(df[to_scale])
-scaled_df = pd.DataFrame(
-    scaled,
-    columns=[f"{c}_scaled" for c in to_scale],
-    index=df.index
-)
+scaled_df = scale_features(df[to_scale])
 st.write("Scaled feature sample:", scaled_df.head())
 
 # Faceted histogram of scaled features
-melted = scaled_df.melt(var_name="feature", value_name="value")
-fig_scaled = px.histogram(
-    melted, x="value", facet_col="feature",
-    title="Scaled Feature Distributions",
-    nbins=50
+def scaled_approx():
+    scaled_sample = df[["Store", "SampleWeight"]].join(scaled_df)
+    return pd.concat(
+        {c: estimate_histogram(scaled_sample, c, bins=50) for c in scaled_df.columns},
+        names=["feature"]
+    ).reset_index(level="feature")
+
+def scaled_exact():
+    full = impute(load_full())[to_scale]
+    # same z-scores StandardScaler gives, without fitting on the worker thread
+    full = (full - full.mean()) / full.std(ddof=0)
+    return pd.concat(
+        {f"{c}_scaled": histogram(full, c, bins=50) for c in to_scale},
+        names=["feature"]
+    ).reset_index(level="feature")
+
+show_chart(
+    "fe_scaled_features",
+    scaled_approx,
+    scaled_exact,
+    draw_hist("Scaled Feature Distributions", "value", facet_col="feature"),
+    approx_mode,
 )
-st.plotly_chart(fig_scaled, use_container_width=True)
 st.markdown("""
 > **Why?**  
 Standardizing to zero mean/unit variance accelerates and stabilizes model training.
@@ -125,13 +239,30 @@ Standardizing to zero mean/unit variance accelerates and stabilizes model traini
 
 # Aggregation-based feature: avg sales by StoreType
 st.subheader("📊 Aggregation Feature: Avg Sales per StoreType")
-agg = df.groupby("StoreType").Sales.mean().reset_index()
-fig_agg = px.bar(
-    agg, x="StoreType", y="Sales",
-    title="Avg Sales by StoreType",
-    labels={"Sales":"Avg Sales"}
+def store_type_exact():
+    store_types = pd.read_csv(STORE_PATH, usecols=["Store", "StoreType"])
+    type_sales = read_train(columns=["Store", "Sales"]).merge(store_types, on="Store", how="left")
+    return type_sales.groupby("StoreType").Sales.mean().reset_index()
+
+def draw_store_type(agg, approx):
+    fig_agg = px.bar(
+        agg, x="StoreType", y="Sales",
+        title="Avg Sales by StoreType" + approx_note(sample, approx),
+        labels={"Sales":"Avg Sales"},
+        **error_bars(agg, "Sales")
+    )
+    st.plotly_chart(fig_agg, use_container_width=True)
+
+show_chart(
+    "avg_sales_by_store_type",
+    lambda: estimate_mean(df, "Sales", by="StoreType")
+                .rename_axis("StoreType")
+                .reset_index()
+                .rename(columns={"estimate": "Sales"}),
+    store_type_exact,
+    draw_store_type,
+    approx_mode,
 )
-st.plotly_chart(fig_agg, use_container_width=True)
 st.markdown("""
 > **Why?**  
 Captures group-level effects: e.g. “Type A” stores may systematically sell more than “Type C.”
@@ -139,17 +270,14 @@ Captures group-level effects: e.g. “Type A” stores may systematically sell m
 
 # (Bonus) Feature: months since competition opened
 st.subheader("⏳ Competition Open Duration")
-# derive months open = (Year ×12 + Month) – (CompetitionOpenSinceYear×12 + CompetitionOpenSinceMonth)
-df["CompOpenMonths"] = (
-    (df.year * 12 + df.month)
-  - (df.CompetitionOpenSinceYear.fillna(df.year).astype(int) * 12
-     + df.CompetitionOpenSinceMonth.fillna(df.month).astype(int))
-)
-fig_co = px.histogram(
-    df, x="CompOpenMonths", nbins=30,
-    title="Distribution of Months Since Competition Opened"
+df["CompOpenMonths"] = comp_open_months(df)
+show_chart(
+    "fe_comp_open_months",
+    lambda: estimate_histogram(df, "CompOpenMonths", bins=30),
+    lambda: histogram(load_full().assign(CompOpenMonths=comp_open_months), "CompOpenMonths", bins=30),
+    draw_hist("Distribution of Months Since Competition Opened", "CompOpenMonths"),
+    approx_mode,
 )
-st.plotly_chart(fig_co, use_container_width=True)
 st.markdown("""
 > **Why?**  
 Stores with longer-standing nearby competition might see lower sales—this feature quantifies that effect.
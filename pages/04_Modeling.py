@@ -1,17 +1,8 @@
 import streamlit as st
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import (
-    confusion_matrix,
-    classification_report,
-    roc_curve,
-    auc
-)
 import plotly.express as px
-import plotly.figure_factory as ff
 
-from scripts.data_utils import load_data, prepare_features
+from scripts.data_utils import load_data, load_metadata, prepare_features
 
 st.title("🧠 Modeling")
 st.markdown("""
@@ -25,16 +16,22 @@ Build and evaluate simple ML models on Rossmann store data:
 @st.cache_data
 def get_features():
     df = load_data()
-    X, y = prepare_features(df)
+    X, y = prepare_features(df, sales_median=load_metadata()["train"]["sales_median"])
     return X, y
 
 X, y = get_features()
 
 # Clustering stores by sales
 st.subheader("1️⃣ K-Means Clustering of Stores")
+@st.cache_data
+def fit_clusters(X, n_clusters):
+    from sklearn.cluster import KMeans
+
+    km = KMeans(n_clusters=n_clusters, random_state=42)
+    return km.fit_predict(X)
+
 n_clusters = st.slider("Number of clusters", min_value=2, max_value=8, value=4)
-km = KMeans(n_clusters=n_clusters, random_state=42)
-clusters = km.fit_predict(X)
+clusters = fit_clusters(X, n_clusters)
 cluster_counts = pd.Series(clusters).value_counts().sort_index()
 
 # Show cluster sizes bar chart
@@ -57,23 +54,48 @@ st.subheader("2️⃣ Logistic Regression: Predict High-Sales Days")
 # but if not, we'll define:
 y = y  # from prepare_features: 1 = high-sales day, 0 = otherwise
 
+@st.cache_data
+def fit_logreg(X, y, test_size, C):
+    """
+    Split, fit a logistic regression and return the test-set report,
+    confusion matrix and ROC curve.
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import (
+        confusion_matrix,
+        classification_report,
+        roc_curve,
+        auc
+    )
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=42
+    )
+    lr = LogisticRegression(C=C, max_iter=200)
+    lr.fit(X_train, y_train)
+    y_pred = lr.predict(X_test)
+    y_proba = lr.predict_proba(X_test)[:, 1]
+
+    fpr, tpr, _ = roc_curve(y_test, y_proba)
+    return {
+        "report": classification_report(y_test, y_pred, output_dict=True),
+        "cm": confusion_matrix(y_test, y_pred),
+        "fpr": fpr,
+        "tpr": tpr,
+        "auc": auc(fpr, tpr),
+    }
+
 # train/test split slider
-from sklearn.model_selection import train_test_split
 test_size = st.slider("Test set proportion", 0.1, 0.5, 0.2, step=0.05)
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=test_size, random_state=42
-)
 
 # train logistic regression with regularization control
 C = st.number_input("Inverse regularization (C)", min_value=0.01, max_value=10.0, value=1.0)
-lr = LogisticRegression(C=C, max_iter=200)
-lr.fit(X_train, y_train)
-y_pred = lr.predict(X_test)
-y_proba = lr.predict_proba(X_test)[:, 1]
+results = fit_logreg(X, y, test_size, C)
 
 # Metrics: classification report table
 st.markdown("**Classification Report**")
-report = classification_report(y_test, y_pred, output_dict=True)
+report = results["report"]
 df_report = pd.DataFrame(report).transpose().round(2)
 st.dataframe(df_report)
 
@@ -84,9 +106,9 @@ st.markdown("""
 """)
 
 # Confusion matrix heatmap
-cm = confusion_matrix(y_test, y_pred)
+import plotly.figure_factory as ff
 fig_cm = ff.create_annotated_heatmap(
-    z=cm,
+    z=results["cm"],
     x=["Pred 0","Pred 1"],
     y=["True 0","True 1"],
     colorscale="Blues"
@@ -96,8 +118,7 @@ st.plotly_chart(fig_cm, use_container_width=True)
 st.markdown("Confusion matrix: rows = actual class, columns = predicted.")
 
 # ROC curve
-fpr, tpr, _ = roc_curve(y_test, y_proba)
-roc_auc = auc(fpr, tpr)
+fpr, tpr, roc_auc = results["fpr"], results["tpr"], results["auc"]
 fig_roc = px.area(
     x=fpr, y=tpr,
     title=f"ROC Curve (AUC = {roc_auc:.2f})",
@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import statsmodels.formula.api as smf
 import plotly.express as px
 
 from scripts.data_utils import load_data
@@ -14,6 +13,8 @@ Promo flag and Customer count, then interpret coefficients and assess model fit.
 
 @st.cache_data
 def fit_ols():
+    import statsmodels.formula.api as smf
+
     # Load merged train+store data
     df = load_data()
     # Impute missing competition distances
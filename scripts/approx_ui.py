@@ -0,0 +1,65 @@
+import streamlit as st
+
+from scripts.data_utils import sources_mtime
+from scripts.sample_utils import SAMPLE_FRACTIONS, exact_in_background, load_sample, sample_fraction
+
+# How often a chart still showing its approximation checks for the exact result.
+POLL_SECONDS = 1.0
+
+@st.cache_data
+def get_sample(frac, source_mtime):
+    return load_sample(frac)
+
+def query_mode_sidebar():
+    """
+    Sidebar toggle between approximate and exact mode, plus the sample-size picker.
+    Returns (approx_mode, sample); sample is None in exact mode.
+    """
+    approx_mode = st.sidebar.toggle(
+        "Approximate mode", value=True,
+        help="Answer charts from a stratified sample first (with 95% CIs), then swap in the exact result."
+    )
+    frac = st.sidebar.select_slider(
+        "Sample size", options=SAMPLE_FRACTIONS,
+        format_func=lambda f: f"{f:.0%}", disabled=not approx_mode
+    )
+    sample = get_sample(frac, sources_mtime()) if approx_mode else None
+    return approx_mode, sample
+
+def approx_note(sample, approx):
+    """
+    Title suffix for charts drawn from `sample`.
+    """
+    return f" (≈ from {sample_fraction(sample):.1%} sample)" if approx else ""
+
+def error_bars(frame, y):
+    """
+    Plotly error-bar kwargs for a frame with ci_low/ci_high columns; empty for exact frames.
+    """
+    if "ci_low" not in frame:
+        return {}
+    return {"error_y": frame.ci_high - frame[y], "error_y_minus": frame[y] - frame.ci_low}
+
+def show_chart(key, approx_fn, exact_fn, draw, approx_mode):
+    """
+    Render `draw(result, approx)`. Exact mode computes `exact_fn()` here. Approximate
+    mode draws `approx_fn()` at once and runs the exact query on a worker thread; a
+    polling fragment reruns the page when it lands, so the script never waits on it.
+    """
+    if not approx_mode:
+        draw(exact_fn(), False)
+        return
+    future = exact_in_background(key, exact_fn)
+    if not future.done():
+        st.fragment(_await_exact, run_every=POLL_SECONDS)(future, approx_fn(), draw)
+    elif future.exception() is not None:
+        st.warning(f"Exact result failed, showing the sample estimate instead: {future.exception()!r}")
+        draw(approx_fn(), True)
+    else:
+        draw(future.result(), False)
+
+def _await_exact(future, approx_result, draw):
+    # a full rerun picks up the finished result and stops this fragment from polling
+    if future.done():
+        st.rerun()
+    draw(approx_result, True)
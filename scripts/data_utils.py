@@ -1,23 +1,231 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
 import pandas as pd
 
+TRAIN_PATH = "data/train.csv"
+STORE_PATH = "data/store.csv"
+METADATA_PATH = "data/metadata.json"
+PARTITIONED_TRAIN_DIR = "data/train_partitioned"
+ROW_GROUP_SIZE = 4096
+
+# Serialises partition rebuilds across Streamlit sessions and background workers.
+_partition_lock = threading.Lock()
+# Inside PARTITIONED_TRAIN_DIR: names the live version directory / records its source file.
+CURRENT_POINTER = "CURRENT"
+SOURCE_MARKER = "_source.json"
+
 def load_data():
     """
     Load and merge train + store datasets.
     Returns a DataFrame with a Date column parsed.
+    Also (re)writes the metadata sidecar and partitioned train data if missing or stale.
     """
-    df_train = pd.read_csv("data/train.csv", parse_dates=["Date"])
-    df_store = pd.read_csv("data/store.csv")
+    df_train = pd.read_csv(TRAIN_PATH, parse_dates=["Date"])
+    df_store = pd.read_csv(STORE_PATH)
+    if _metadata_is_stale():
+        write_metadata(df_train, df_store)
+    _ensure_partitions(df_train)
     df = df_train.merge(df_store, on="Store", how="left")
     return df
 
-def prepare_features(df):
+def sources_mtime():
+    """
+    Latest modification time of the source CSVs, used to key caches on the data version.
+    """
+    return max(os.path.getmtime(TRAIN_PATH), os.path.getmtime(STORE_PATH))
+
+def source_signature(path):
+    """
+    Path, mtime and size of a source file; any change (even to an older mtime) means new data.
+    """
+    stat = os.stat(path)
+    return {"path": path, "mtime": stat.st_mtime, "size": stat.st_size}
+
+def build_metadata(df_train, df_store):
+    """
+    Summarise the raw train + store tables into a small JSON-serialisable dict:
+    row counts, date bounds, distinct stores, per-column null counts and the Sales median.
+    """
+    return {
+        "sources": {
+            "train": source_signature(TRAIN_PATH),
+            "store": source_signature(STORE_PATH),
+        },
+        "train": {
+            "rows": int(len(df_train)),
+            "cols": int(df_train.shape[1]),
+            "date_min": df_train.Date.min().date().isoformat(),
+            "date_max": df_train.Date.max().date().isoformat(),
+            "n_stores": int(df_train.Store.nunique()),
+            "null_counts": {c: int(n) for c, n in df_train.isnull().sum().items()},
+            "sales_median": float(df_train.Sales.median()),
+            "sales_min": float(df_train.Sales.min()),
+            "sales_max": float(df_train.Sales.max()),
+        },
+        "store": {
+            "rows": int(len(df_store)),
+            "cols": int(df_store.shape[1]),
+            "null_counts": {c: int(n) for c, n in df_store.isnull().sum().items()},
+        },
+    }
+
+def write_metadata(df_train, df_store, path=METADATA_PATH):
+    """
+    Build the metadata sidecar from already-loaded tables and write it next to the data.
+    """
+    meta = build_metadata(df_train, df_store)
+    with open(path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def load_metadata(path=METADATA_PATH):
+    """
+    Read the metadata sidecar, rebuilding it from the CSVs only when it is
+    missing or older than the source files.
+    """
+    if _metadata_is_stale(path):
+        df_train = pd.read_csv(TRAIN_PATH, parse_dates=["Date"])
+        df_store = pd.read_csv(STORE_PATH)
+        return write_metadata(df_train, df_store, path)
+    with open(path) as f:
+        return json.load(f)
+
+def _metadata_is_stale(path=METADATA_PATH):
+    """
+    True if the sidecar does not exist or a source CSV changed since it was written.
+    """
+    if not os.path.exists(path):
+        return True
+    try:
+        with open(path) as f:
+            sources = json.load(f)["sources"]
+    except (ValueError, KeyError):
+        return True
+    return any(source_signature(src["path"]) != src for src in sources.values())
+
+def write_partitioned(df_train, out_dir=PARTITIONED_TRAIN_DIR, row_group_size=ROW_GROUP_SIZE):
+    """
+    Write train data as Parquet, one YearMonth=YYYY-MM folder per month, sorted by
+    Store within each file so row-group statistics let Store filters skip data.
+    Each rebuild goes to a fresh version directory; the CURRENT pointer is then swapped
+    atomically, so readers scanning the previous version are never pulled out from under.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # StateHoliday mixes 0 and "0" in the raw CSV; Parquet needs one type per column
+    df_train = df_train.astype({c: str for c in df_train.select_dtypes("object").columns})
+    schema = pa.Schema.from_pandas(df_train, preserve_index=False)
+    os.makedirs(out_dir, exist_ok=True)
+    previous = _current_version(out_dir)
+    # private version dir, so concurrent writers never share one
+    version_dir = tempfile.mkdtemp(prefix="v-", dir=out_dir)
+    for month, part in df_train.groupby(df_train.Date.dt.strftime("%Y-%m")):
+        part_dir = os.path.join(version_dir, f"YearMonth={month}")
+        os.makedirs(part_dir)
+        table = pa.Table.from_pandas(part.sort_values(["Store", "Date"]), schema=schema, preserve_index=False)
+        pq.write_table(table, os.path.join(part_dir, "part-0.parquet"), row_group_size=row_group_size)
+    # "_" files are skipped by pyarrow's dataset discovery
+    with open(os.path.join(version_dir, SOURCE_MARKER), "w") as f:
+        json.dump(source_signature(TRAIN_PATH), f)
+
+    fd, pointer_tmp = tempfile.mkstemp(prefix=".current-", dir=out_dir)
+    with os.fdopen(fd, "w") as f:
+        f.write(os.path.basename(version_dir))
+    os.replace(pointer_tmp, os.path.join(out_dir, CURRENT_POINTER))
+
+    # keep the version just replaced for readers still scanning it; drop anything older
+    keep = {os.path.basename(version_dir), previous and os.path.basename(previous)}
+    for entry in os.listdir(out_dir):
+        entry_path = os.path.join(out_dir, entry)
+        if entry not in keep and os.path.isdir(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+def read_train(start=None, end=None, stores=None, columns=None, path=PARTITIONED_TRAIN_DIR):
+    """
+    Read train rows with start <= Date <= end and Store in `stores` (None = unfiltered),
+    keeping only `columns`. Only matching month partitions and Store row groups are read.
+    """
+    import pyarrow.dataset as ds
+
+    _ensure_partitions(path=path)
+    dataset = ds.dataset(_current_version(path), format="parquet", partitioning="hive")
+
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions += [ds.field("YearMonth") >= start.strftime("%Y-%m"), ds.field("Date") >= start]
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions += [ds.field("YearMonth") <= end.strftime("%Y-%m"), ds.field("Date") <= end]
+    if stores is not None:
+        stores = sorted(int(s) for s in stores)
+        if not stores:
+            conditions.append(ds.scalar(False))
+        else:
+            # min/max bounds let row-group statistics prune; isin keeps the exact set
+            conditions += [
+                ds.field("Store") >= stores[0],
+                ds.field("Store") <= stores[-1],
+                ds.field("Store").isin(stores),
+            ]
+    filter_expr = None
+    for cond in conditions:
+        filter_expr = cond if filter_expr is None else filter_expr & cond
+
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c != "YearMonth"]
+    return dataset.to_table(columns=list(columns), filter=filter_expr).to_pandas()
+
+def _ensure_partitions(df_train=None, path=PARTITIONED_TRAIN_DIR):
+    """
+    (Re)write the partitioned train data if it is missing or stale, one writer at a time.
+    """
+    with _partition_lock:
+        if not _partitions_are_stale(path):
+            return
+        if df_train is None:
+            df_train = pd.read_csv(TRAIN_PATH, parse_dates=["Date"])
+        write_partitioned(df_train, path)
+
+def _current_version(path=PARTITIONED_TRAIN_DIR):
+    """
+    Directory of the live partitioned version, or None if nothing was written yet.
+    """
+    try:
+        with open(os.path.join(path, CURRENT_POINTER)) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+def _partitions_are_stale(path=PARTITIONED_TRAIN_DIR):
+    """
+    True if there is no live version or it was built from a different train.csv.
+    """
+    version_dir = _current_version(path)
+    if version_dir is None:
+        return True
+    try:
+        with open(os.path.join(version_dir, SOURCE_MARKER)) as f:
+            return json.load(f) != source_signature(TRAIN_PATH)
+    except (OSError, ValueError):
+        return True
+
+def prepare_features(df, sales_median=None):
     """
     From the merged df, create:
       - X: numeric feature matrix
       - y: binary target HighSales
+    Pass `sales_median` (e.g. from the metadata sidecar) to skip recomputing it.
     """
     df = df.copy()
-    df["HighSales"] = (df.Sales > df.Sales.median()).astype(int)
+    if sales_median is None:
+        sales_median = df.Sales.median()
+    df["HighSales"] = (df.Sales > sales_median).astype(int)
     X = df[["CompetitionDistance", "Promo2SinceWeek"]].fillna(0)
     y = df["HighSales"]
     return X, y
@@ -0,0 +1,197 @@
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scripts.data_utils import STORE_PATH, TRAIN_PATH, load_data, source_signature, sources_mtime
+
+SAMPLE_DIR = "data/samples"
+SAMPLE_FRACTIONS = (0.01, 0.10)
+Z_95 = 1.96
+SOURCE_MARKER = "_source.json"
+
+# Serialises sample rebuilds across Streamlit sessions.
+_sample_lock = threading.Lock()
+
+# Background workers for exact results that replace approximate ones once ready.
+_executor = ThreadPoolExecutor(max_workers=2)
+_futures = {}
+_futures_lock = threading.Lock()
+_reported_failures = set()
+_MAX_FUTURES = 64
+
+def stratified_sample(df, frac, seed=42):
+    """
+    Draw `frac` of each store's rows (at least two) by systematic sampling in date order:
+    stores are explicit strata and months implicit ones, since draws are evenly spaced in time.
+    Adds a SampleWeight column = store rows / rows drawn, so weighted sums estimate full totals.
+    """
+    df = df.sort_values(["Store", "Date"])
+    by_store = df.groupby("Store")
+    sizes = by_store.Store.transform("size")
+    n_draw = np.minimum(sizes, np.maximum(2, np.round(sizes * frac))).astype(int)
+    pos = by_store.cumcount()
+    rng = np.random.default_rng(seed)
+    stores = df.Store.unique()
+    offset = df.Store.map(pd.Series(rng.random(len(stores)), index=stores))
+    # draw row `pos` whenever floor(pos·n/N + u) steps up: exactly n evenly spaced rows per store
+    keep = np.floor((pos + 1) * n_draw / sizes + offset) > np.floor(pos * n_draw / sizes + offset)
+    sample = df.loc[keep].copy()
+    sample["SampleWeight"] = (sizes / n_draw)[keep]
+    return sample
+
+def sample_fraction(sample):
+    """
+    Fraction of the full data actually drawn into `sample`.
+    """
+    return len(sample) / sample["SampleWeight"].sum()
+
+def build_samples(df, fractions=SAMPLE_FRACTIONS, out_dir=SAMPLE_DIR):
+    """
+    Pre-build one stratified sample per fraction from the merged data and pickle it under `out_dir`.
+    Each file is written to a temp name and renamed into place, so readers never see a partial pickle;
+    the source marker is written last.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for frac in fractions:
+        fd, tmp_path = tempfile.mkstemp(prefix=".sample-", dir=out_dir)
+        os.close(fd)
+        stratified_sample(df, frac).to_pickle(tmp_path)
+        os.replace(tmp_path, _sample_path(frac, out_dir))
+    fd, tmp_path = tempfile.mkstemp(prefix=".source-", dir=out_dir)
+    with os.fdopen(fd, "w") as f:
+        json.dump(_sources(), f)
+    os.replace(tmp_path, os.path.join(out_dir, SOURCE_MARKER))
+
+def load_sample(frac, out_dir=SAMPLE_DIR):
+    """
+    Load the pre-built sample for `frac`, (re)building every sample from the
+    merged data (one builder at a time) if any is missing or the source CSVs changed.
+    """
+    path = _sample_path(frac, out_dir)
+    with _sample_lock:
+        if not os.path.exists(path) or _samples_are_stale(out_dir):
+            build_samples(load_data(), fractions=sorted(set(SAMPLE_FRACTIONS) | {frac}), out_dir=out_dir)
+    return pd.read_pickle(path)
+
+def _sources():
+    return [source_signature(TRAIN_PATH), source_signature(STORE_PATH)]
+
+def _samples_are_stale(out_dir=SAMPLE_DIR):
+    """
+    True if the samples were built from different source CSVs (or never finished building).
+    """
+    try:
+        with open(os.path.join(out_dir, SOURCE_MARKER)) as f:
+            return json.load(f) != _sources()
+    except (OSError, ValueError):
+        return True
+
+def _sample_path(frac, out_dir):
+    return os.path.join(out_dir, f"sample_{frac * 100:g}pct.pkl")
+
+def estimate_total(sample, col, by=None, where=None, z=Z_95):
+    """
+    Estimate the sum of `col` (optionally per `by` group and restricted to rows in `where`)
+    from a stratified sample. Returns a DataFrame with estimate, ci_low and ci_high.
+    """
+    y = sample[col] if where is None else sample[col].where(where, 0)
+    lin = sample["SampleWeight"] * y
+    groups = _group_keys(sample, by)
+    est = lin.groupby(groups).sum()
+    # a total of non-negative values (sales, counts) can't be below 0
+    lower = 0 if (y.dropna() >= 0).all() else None
+    return _with_ci(est, _domain_variance(sample, lin, groups), z, lower=lower)
+
+def estimate_mean(sample, col, by=None, where=None, z=Z_95):
+    """
+    Estimate the mean of `col` (optionally per `by` group and restricted to rows in `where`)
+    from a stratified sample. Returns a DataFrame with estimate, ci_low and ci_high.
+    """
+    w = sample["SampleWeight"] if where is None else sample["SampleWeight"].where(where, 0)
+    groups = _group_keys(sample, by)
+    w_tot = w.groupby(groups).sum()
+    est = (w * sample[col]).groupby(groups).sum() / w_tot
+    # linearised ratio estimator: w·(y − mean)/W within each group
+    lin = w * (sample[col] - groups.map(est)) / groups.map(w_tot)
+    return _with_ci(est, _domain_variance(sample, lin, groups), z)
+
+def estimate_histogram(sample, col, bins=50, range=None, z=Z_95):
+    """
+    Estimate full-data bin counts of `col` from a stratified sample, with confidence intervals.
+    """
+    edges = np.histogram_bin_edges(sample[col].dropna(), bins=bins, range=range)
+    bin_idx = np.clip(np.searchsorted(edges, sample[col], side="right") - 1, 0, len(edges) - 2)
+    inside = sample[col].between(edges[0], edges[-1])
+    est = estimate_total(sample.assign(count=1.0), "count", by=bin_idx, where=inside, z=z)
+    hist = _bins_frame(edges).join(est.reindex(np.arange(len(edges) - 1), fill_value=0))
+    # a bin the sample missed says nothing about its true count, so give it no interval
+    hist.loc[hist.estimate == 0, ["ci_low", "ci_high"]] = np.nan
+    return hist
+
+def estimate_corr(sample, cols):
+    """
+    Weighted Pearson correlation matrix of `cols` from a stratified sample.
+    """
+    values = sample[cols].dropna()
+    cov = np.cov(values.to_numpy().T, aweights=sample.loc[values.index, "SampleWeight"])
+    sd = np.sqrt(np.diag(cov))
+    return pd.DataFrame(cov / np.outer(sd, sd), index=cols, columns=cols)
+
+def histogram(df, col, bins=50, range=None):
+    """
+    Exact bin counts of `col`, in the same layout as `estimate_histogram`.
+    """
+    counts, edges = np.histogram(df[col].dropna(), bins=bins, range=range)
+    return _bins_frame(edges).assign(estimate=counts)
+
+def _bins_frame(edges):
+    return pd.DataFrame({"bin_left": edges[:-1], "bin_right": edges[1:], "bin_mid": (edges[:-1] + edges[1:]) / 2})
+
+def _group_keys(sample, by):
+    if by is None:
+        return pd.Series("all", index=sample.index)
+    if isinstance(by, str):
+        return sample[by]
+    return pd.Series(by, index=sample.index)
+
+def _domain_variance(sample, lin, groups):
+    """
+    Variance of each group's linearised total, stratified by Store. The systematic
+    draw within a store is treated as simple random, which is conservative for seasonal data.
+    """
+    n_h = sample.groupby("Store").Store.transform("size")
+    per = pd.DataFrame({"group": groups, "Store": sample.Store, "s": lin, "s2": lin ** 2, "n": n_h})
+    per = per.groupby(["group", "Store"]).agg(s=("s", "sum"), s2=("s2", "sum"), n=("n", "first"))
+    var = (per.n / (per.n - 1) * (per.s2 - per.s ** 2 / per.n)).where(per.n > 1, 0)
+    return var.groupby(level="group").sum()
+
+def _with_ci(est, var, z, lower=None):
+    se = np.sqrt(var.reindex(est.index).clip(lower=0))
+    return pd.DataFrame({"estimate": est, "ci_low": (est - z * se).clip(lower=lower), "ci_high": est + z * se})
+
+def exact_in_background(key, fn, *args):
+    """
+    Start `fn(*args)` on a worker thread (once per `key` and data version) and return its
+    Future, so pages can show an approximate answer first and swap in the exact one when done.
+    A failed run is returned once, so the page can report it, and retried on the next call.
+    """
+    key = (key, sources_mtime())
+    with _futures_lock:
+        future = _futures.get(key)
+        if future is not None and future.done() and future.exception() is not None:
+            if key not in _reported_failures:
+                _reported_failures.add(key)
+                return future
+            _reported_failures.discard(key)
+            future = None
+        if future is None:
+            _futures.pop(key, None)
+            if len(_futures) >= _MAX_FUTURES:
+                _futures.pop(next(iter(_futures)))
+            future = _futures[key] = _executor.submit(fn, *args)
+    return future